@@ -21,11 +21,6 @@ def save_checkpoint(args, trainer, epoch, val_loss):
     if trainer.data_parallel_rank == 0:
         os.makedirs(args.save_dir, exist_ok = True)
 
-    prev_best = getattr(save_checkpoint, "best", val_loss)
-    if val_loss is not None:
-        best_function = max 
-        save_checkpoint.best = best_function(val_loss, prev_best)
-
     if not trainer.should_save_checkpoint_on_current_rank:
         return
     
@@ -42,14 +37,18 @@ def save_checkpoint(args, trainer, epoch, val_loss):
     checkpoint_conds = collections.OrderedDict()
     checkpoint_conds["checkpoint{}.pt".format(epoch)] = (epoch % args.save_interval == 0)
     checkpoint_conds["checkpoint_best.pt"] = val_loss is not None and (
-        not hasattr(save_checkpoint, "best")
-        or is_better(val_loss, save_checkpoint.best)
+        trainer.best_saved_auroc is None or is_better(val_loss, trainer.best_saved_auroc)
     )
     checkpoint_conds["checkpoint_last.pt"] = True
 
+    # compare against the best of the saved checkpoints rather than trainer.best_auroc,
+    # which also covers the epochs skipped by --save_interval
+    if checkpoint_conds["checkpoint_best.pt"]:
+        trainer.best_saved_auroc = val_loss
+
     extra_state = {"val_loss": val_loss}
-    if hasattr(save_checkpoint, "best"):
-        extra_state.update({"best": save_checkpoint.best})
+    if trainer.best_saved_auroc is not None:
+        extra_state.update({"best": trainer.best_saved_auroc})
     
     checkpoints = [
         os.path.join(args.save_dir, fn) for fn, cond in checkpoint_conds.items() if cond
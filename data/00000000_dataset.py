@@ -1,3 +1,8 @@
+import os
+
+import numpy as np
+import torch
+
 from . import BaseDataset, register_dataset
 
 @register_dataset("00000000_dataset")
@@ -21,7 +26,13 @@ class MyDataset00000000(BaseDataset):
         **kwargs,
     ):
         super().__init__()
-        ...
+        # Example: memory-map the flat arrays dumped by the preprocessing script once here,
+        # so that __getitem__ only slices them instead of deserializing (e.g., unpickling)
+        # each sample in the data loader workers.
+        self.codes = np.memmap(os.path.join(data_path, "features.bin"), dtype=np.int32, mode="r")
+        self.times = np.memmap(os.path.join(data_path, "times.bin"), dtype=np.int64, mode="r")
+        self.offsets = np.load(os.path.join(data_path, "offsets.npy"))
+        self.labels = np.load(os.path.join(data_path, "labels.npy"))
     
     def __getitem__(self, index):
         """
@@ -42,10 +53,15 @@ class MyDataset00000000(BaseDataset):
                         (...)
                 
         """
-        ...
+        start, end = self.offsets[index], self.offsets[index + 1]
+        # copy the slices out of the read-only memory maps
+        codes = torch.from_numpy(np.array(self.codes[start:end]))
+        times = torch.from_numpy(np.array(self.times[start:end]))
+        label = torch.from_numpy(self.labels[index])
+        return {"codes": codes, "times": times, "label": label}
     
     def __len__(self):
-        ...
+        return len(self.offsets) - 1
 
     def collator(self, samples):
         """Merge a list of samples to form a mini-batch.
@@ -60,4 +76,20 @@ class MyDataset00000000(BaseDataset):
             You can use it to make your batch on your own such as outputting padding mask together.
             Otherwise, you don't need to implement this method.
         """
-        raise NotImplementedError
\ No newline at end of file
+        # pad the variable-length events of each stay to the longest one in the batch
+        lengths = torch.tensor([len(s["codes"]) for s in samples])
+        codes = torch.nn.utils.rnn.pad_sequence(
+            [s["codes"] for s in samples], batch_first=True, padding_value=0
+        )
+        times = torch.nn.utils.rnn.pad_sequence(
+            [s["times"] for s in samples], batch_first=True, padding_value=0
+        )
+        padding_mask = torch.arange(codes.size(1))[None, :] >= lengths[:, None]
+
+        return {
+            "codes": codes,
+            "times": times,
+            "lengths": lengths,
+            "padding_mask": padding_mask,
+            "label": torch.stack([s["label"] for s in samples]),
+        }
\ No newline at end of file
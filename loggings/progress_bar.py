@@ -299,6 +299,24 @@ except ImportError:
     wandb = None
 
 
+def init_wandb(wandb_project, wandb_entity, run_name=None, config=None):
+    """Initialize the wandb run once per process, if wandb is available.
+
+    The warning for missing wandb is left to :class:`WandBProgressBarWrapper`.
+    """
+    if wandb is None or wandb.run is not None:
+        return
+    # reinit=False to ensure if wandb.init() is called multiple times
+    # within one process it still references the same run
+    wandb.init(
+        project=wandb_project,
+        entity=wandb_entity,
+        reinit=False,
+        name=run_name,
+        config=config
+    )
+
+
 class WandBProgressBarWrapper(BaseProgressBar):
     """Log to Weights & Biases."""
 
@@ -308,9 +326,9 @@ class WandBProgressBarWrapper(BaseProgressBar):
             logger.warning("wandb not found, pip install wandb")
             return
 
-        # reinit=False to ensure if wandb.init() is called multiple times
-        # within one process it still references the same run
-        wandb.init(project=wandb_project, entity=wandb_entity, reinit=False, name=run_name)
+        # reuses the current run if it has already been initialized, to avoid
+        # calling wandb.init() every time a progress bar is created
+        init_wandb(wandb_project, wandb_entity, run_name=run_name)
 
     def __iter__(self):
         return iter(self.wrapped_bar)
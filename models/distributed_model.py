@@ -41,9 +41,21 @@ def DistributedModel(args, model, process_group, device):
         broadcast_buffers=args.broadcast_buffers,
         bucket_cap_mb=args.bucket_cap_mb,
         process_group=process_group,
-        find_unused_parameters=args.find_unused_parameters
+        find_unused_parameters=args.find_unused_parameters,
+        static_graph=getattr(args, "static_graph", False),
+        gradient_as_bucket_view=getattr(args, "gradient_as_bucket_view", False)
     )
 
+    ddp_comm_hook = getattr(args, "ddp_comm_hook", "none")
+    if ddp_comm_hook != "none":
+        from torch.distributed.algorithms.ddp_comm_hooks import default_hooks
+
+        hook = {
+            "fp16": default_hooks.fp16_compress_hook,
+            "bf16": default_hooks.bf16_compress_hook,
+        }[ddp_comm_hook]
+        wrapped_model.register_comm_hook(state=None, hook=hook)
+
     # forward missing getattr and state_dict/load_state_dict to orig model
     wrapped_model = ModuleProxyWrapper(wrapped_model)
 
@@ -26,7 +26,24 @@ class Adam(Optimizer):
 
     def __init__(self, cfg: Namespace, params, **kwargs):
         super().__init__(cfg, **kwargs)
-        self._optimizer = Adam(params, **self.optimizer_config)
+        params = list(params)
+        impl = getattr(cfg, "optimizer_impl", None)
+        if impl is None:
+            impl = "fused" if all(p.is_cuda for p in params) else "foreach"
+
+        if impl == "for-loop":
+            self._optimizer = Adam(params, **self.optimizer_config)
+        else:
+            # the fused and foreach implementations update all the parameters with a few
+            # kernel launches instead of per parameter.
+            # torch.optim.AdamW has the same decoupled weight decay as Adam below.
+            self._optimizer = torch.optim.AdamW(
+                params,
+                fused=(impl == "fused"),
+                foreach=(impl == "foreach"),
+                **self.optimizer_config
+            )
+        logger.info("using {} implementation of Adam".format(impl))
     
     @property
     def optimizer_config(self):
@@ -40,7 +57,7 @@ class Adam(Optimizer):
             "lr": self.cfg.lr[0]
             if isinstance(self.cfg.lr, Collection)
             else self.cfg.lr,
-            "betas": eval(self.cfg.adam_betas),
+            "betas": tuple(self.cfg.adam_betas),
             "eps": self.cfg.adam_eps,
             "weight_decay": self.cfg.weight_decay
         }
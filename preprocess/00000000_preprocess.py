@@ -1,4 +1,35 @@
+import os
 import argparse
+import pickle
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow # noqa: F401
+    _CSV_ENGINE = "pyarrow"
+except ImportError:
+    _CSV_ENGINE = "c"
+
+# event tables to extract features from, for each EHR source:
+#     source: (file name, ICU id column, code column, time column)
+# NOTE: this is only an example, adjust the tables and the columns to your own features.
+EVENT_TABLES = {
+    "mimiciii": ("LABEVENTS.csv", "ICUSTAY_ID", "ITEMID", "CHARTTIME"),
+    "mimiciv": ("labevents.csv", "stay_id", "itemid", "charttime"),
+    "eicu": ("lab.csv", "patientunitstayid", "labname", "labresultoffset"),
+}
+
+# label files, for each EHR source:
+#     source: (file name, ICU id column, label column)
+# NOTE: adjust the column names to the header of your label files.
+LABEL_TABLES = {
+    "mimiciii": ("mimiciii_labels.csv", "ICUSTAY_ID", "labels"),
+    "mimiciv": ("mimiciv_labels.csv", "stay_id", "labels"),
+    "eicu": ("eicu_labels.csv", "patientunitstayid", "labels"),
+}
+
+VOCAB_PATH = "./00000000_vocab.pkl"
 
 def get_parser():
     """
@@ -27,12 +58,55 @@ def get_parser():
     )
     return parser
 
+def read_table(path, columns):
+    """Read the given columns of a csv file at once (with the pyarrow engine if available)."""
+    return pd.read_csv(path, usecols=columns, engine=_CSV_ENGINE)
+
+def to_seconds(times):
+    """Convert a time column to int64 seconds.
+
+    Numeric columns are regarded as offsets in minutes (e.g., eICU), and the others
+    are parsed as timestamps.
+    """
+    if pd.api.types.is_numeric_dtype(times):
+        return times.to_numpy(dtype=np.int64) * 60
+    # independent of the resolution of the parsed timestamps (not always ns in pandas 2)
+    seconds = (pd.to_datetime(times, utc=True) - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)
+    return seconds.to_numpy(dtype=np.int64)
+
+def encode(codes, vocab):
+    """Map codes to int32 ids with a binary search over the sorted vocabulary.
+
+    Ids start from 1, and 0 is reserved for the codes not in the vocabulary.
+    """
+    codes = codes.astype(str)
+    idx = np.searchsorted(vocab, codes)
+    found = vocab[np.minimum(idx, len(vocab) - 1)] == codes
+    return np.where(found, idx + 1, 0).astype(np.int32)
+
+def parse_labels(labels):
+    """Parse label strings such as "[0, 1, -1]" into an int64 array of shape (n, num_tasks)."""
+    return labels.str.strip("[]").str.split(",", expand=True).to_numpy().astype(np.int64)
+
+def group_by_stay(stay_ids, codes, times, stays):
+    """Sort events by (stay, time) and return them with the offsets of each of `stays`.
+
+    `stays` should be sorted and unique. Events of the other stays are dropped, and the
+    stays without any events get empty ranges, so that no stay is filtered out.
+    """
+    keep = np.isin(stay_ids, stays)
+    stay_ids, codes, times = stay_ids[keep], codes[keep], times[keep]
+    order = np.lexsort((times, stay_ids))
+    stay_ids, codes, times = stay_ids[order], codes[order], times[order]
+    offsets = np.append(np.searchsorted(stay_ids, stays), len(stay_ids)).astype(np.int64)
+    return codes, times, offsets
+
 def main(args):
     """
     TODO:
         Implement your feature preprocessing function here.
         Rename the file name with your student number.
-    
+
     Note:
         1. This script should dump processed features to the --dest directory.
         Note that --dest directory will be an input to your dataset class (i.e., --data_path).
@@ -49,12 +123,72 @@ def main(args):
         you must use the '--sample_filtering' argument to prevent filtering from being applied to the test dataset.
         We will set the '--sample_filtering' argument to False and run the code for inference.
         We also check the total number of test dataset.
+
+    Example:
+        The code below reads each table in EVENT_TABLES at once and processes it column-wise
+        (rather than looping over each patient in python), then dumps all the stays as flat
+        binary arrays that the dataset can memory-map without unpickling anything:
+            - features.bin: int32 codes of all the events
+            - times.bin: int64 times (in seconds) of all the events
+            - offsets.npy: int64 offsets, where the events of the i-th stay are
+                `[offsets[i], offsets[i+1])`
+            - stay_ids.npy, sources.npy: ICU id and EHR source of each stay
+            - labels.npy: int64 labels of each stay, in the shape of (num_stays, 28)
+        Every stay in the label files is kept, in the order of `stay_ids.npy`.
     """
 
     root_dir = args.root
     dest_dir = args.dest
 
+    tables = {}
+    for src, (fname, stay_col, code_col, time_col) in EVENT_TABLES.items():
+        df = read_table(os.path.join(root_dir, src, fname), [stay_col, code_col, time_col])
+        df = df.dropna(subset=[stay_col, code_col, time_col])
+        tables[src] = (
+            df[stay_col].to_numpy(dtype=np.int64),
+            df[code_col].to_numpy(),
+            to_seconds(df[time_col]),
+        )
+
+    # build the vocabulary from the training data, and reuse it for the test data
+    if os.path.exists(VOCAB_PATH):
+        with open(VOCAB_PATH, "rb") as f:
+            vocab = np.array(pickle.load(f))
+    else:
+        vocab = np.unique(np.concatenate([codes.astype(str) for _, codes, _ in tables.values()]))
+        with open(VOCAB_PATH, "wb") as f:
+            pickle.dump(vocab.tolist(), f)
+
+    all_stays, all_sources, all_labels = [], [], []
+    all_codes, all_times, all_offsets = [], [], []
+    num_events = 0
+    for src, (stay_ids, codes, times) in tables.items():
+        fname, stay_col, label_col = LABEL_TABLES[src]
+        df = read_table(os.path.join(root_dir, "labels", fname), [stay_col, label_col])
+        df = df.sort_values(stay_col)
+        stays = df[stay_col].to_numpy(dtype=np.int64)
+
+        codes, times, offsets = group_by_stay(stay_ids, encode(codes, vocab), times, stays)
+        all_stays.append(stays)
+        all_labels.append(parse_labels(df[label_col]))
+        all_sources.append(np.full(len(stays), src))
+        all_codes.append(codes)
+        all_times.append(times)
+        all_offsets.append(offsets[:-1] + num_events)
+        num_events += len(codes)
+
+    os.makedirs(dest_dir, exist_ok=True)
+    np.concatenate(all_codes).astype(np.int32).tofile(os.path.join(dest_dir, "features.bin"))
+    np.concatenate(all_times).astype(np.int64).tofile(os.path.join(dest_dir, "times.bin"))
+    np.save(
+        os.path.join(dest_dir, "offsets.npy"),
+        np.append(np.concatenate(all_offsets), num_events).astype(np.int64)
+    )
+    np.save(os.path.join(dest_dir, "stay_ids.npy"), np.concatenate(all_stays))
+    np.save(os.path.join(dest_dir, "sources.npy"), np.concatenate(all_sources))
+    np.save(os.path.join(dest_dir, "labels.npy"), np.concatenate(all_labels))
+
 if __name__ == "__main__":
     parser = get_parser()
     args = parser.parse_args()
-    main(args)
\ No newline at end of file
+    main(args)
@@ -59,7 +59,7 @@ def get_parser():
     )
     parser.add_argument(
         "--pin_memory",
-        type=bool,
+        action=argparse.BooleanOptionalAction,
         default=True
     )
     parser.add_argument(
@@ -130,7 +130,8 @@ def validate(
     epoch: int,
 ) -> List[Optional[float]]:
     """Evaluate the model on the validation set and return the losses"""
-    
+    is_master = distributed_utils.is_master(args)
+
     trainer.begin_valid_epoch(epoch)
     logger.info(f'begin validation on test subset')
 
@@ -142,16 +143,8 @@ def validate(
         epoch=epoch,
         tensorboard_logdir=None,
         default_log_format=("tqdm"),
-        wandb_project=(
-            args.wandb_project
-            if distributed_utils.is_master(args)
-            else None
-        ),
-        wandb_entity=(
-            args.wandb_entity
-            if distributed_utils.is_master(args)
-            else None
-        ),
+        wandb_project=args.wandb_project if is_master else None,
+        wandb_entity=args.wandb_entity if is_master else None,
         wandb_run_name=os.environ.get(
             "WANDB_NAME", os.path.basename(args.save_dir)
         ),
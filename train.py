@@ -58,6 +58,13 @@ def get_parser():
         default=0.0,
         help="percentage for validation subset"
     )
+    parser.add_argument(
+        "--validate_interval_updates",
+        type=int,
+        default=0,
+        help="validate every N updates in addition to the end of each epoch (0 to disable); "
+        + "mid-epoch scores are only logged, and do not count toward best_auroc"
+    )
 
     # optimizer
     parser.add_argument(
@@ -85,13 +92,29 @@ def get_parser():
         default=50,
         help="max epoch"
     )
+    parser.add_argument(
+        "--min_lr",
+        type=float,
+        default=1e-9,
+        help="stop training when the learning rate reaches this minimum"
+    )
 
     # adam optimizer
     parser.add_argument(
         "--adam_betas",
+        type=float,
+        nargs=2,
+        default=(0.9, 0.999),
+        help="betas for Adam optimizer, e.g., --adam_betas 0.9 0.999"
+    )
+    parser.add_argument(
+        "--optimizer_impl",
         type=str,
-        default="(0.9, 0.999)",
-        help="betas for Adam optimizer"
+        default=None,
+        choices=["fused", "foreach", "for-loop"],
+        help="implementation of the Adam update: fused (single CUDA kernel), foreach "
+        + "(multi-tensor kernels) or for-loop (one update per parameter); "
+        + "defaults to fused on CUDA and foreach otherwise"
     )
     parser.add_argument(
         "--adam_eps",
@@ -147,11 +170,26 @@ def get_parser():
     )
     parser.add_argument(
         "--pin_memory",
-        type=bool,
+        action=argparse.BooleanOptionalAction,
         default=True,
         help="if True, the data loader will copy Tensors into device/CUDA pinned memory "
         + "before returning them."
     )
+    parser.add_argument(
+        "--persistent_workers",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="if True, the data loader will not shut down the worker processes after "
+        + "an epoch, so they are not re-spawned every epoch (ignored if num_workers is 0)"
+    )
+    parser.add_argument(
+        "--prefetch_factor",
+        type=int,
+        default=2,
+        help="number of batches loaded in advance by each worker (ignored if num_workers is 0); "
+        + "note that num_workers * prefetch_factor batches are kept in host memory, "
+        + "so a large value can run the host out of memory"
+    )
     parser.add_argument(
         "--clip_norm",
         type=float,
@@ -163,11 +201,57 @@ def get_parser():
         default=1048576,
         help="number of bytes reserved for gathering stats from workers"
     )
+    parser.add_argument(
+        "--amp_dtype",
+        type=str,
+        default="none",
+        choices=["none", "fp16", "bf16"],
+        help="run forward passes under automatic mixed precision with this dtype; "
+        + "fp16 also enables dynamic loss scaling"
+    )
+    parser.add_argument(
+        "--tf32",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="allow TensorFloat-32 for float32 matmuls and convolutions on Ampere or newer GPUs"
+    )
+    parser.add_argument(
+        "--cudnn_benchmark",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="let cuDNN benchmark and cache the fastest algorithms for each input shape; "
+        + "disable it if input shapes vary a lot between batches, since every new shape "
+        + "is benchmarked again"
+    )
+    parser.add_argument(
+        "--deterministic",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="use deterministic algorithms only (and disable cuDNN benchmarking) for "
+        + "reproducible results, at the cost of speed"
+    )
+    parser.add_argument(
+        "--compile",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="compile the model with torch.compile; this often does not work together "
+        + "with --find_unused_parameters. Batches padded to varying lengths are handled "
+        + "by dynamic shapes, but still cause some recompiles, so padding to a fixed "
+        + "length (or a few bucketed lengths) in the collator works best"
+    )
+    parser.add_argument(
+        "--compile_mode",
+        type=str,
+        default="default",
+        choices=["default", "reduce-overhead", "max-autotune"],
+        help="mode for torch.compile"
+    )
     parser.add_argument(
         "--empty_cache_freq",
         type=int,
         default=0,
-        help="how often to clear the PyTorch CUDA cache (0 to disable)"
+        help="how often to clear the PyTorch CUDA cache (0 to disable); clearing the cache "
+        + "stalls on re-allocation and slows down training, so keep it disabled unless needed"
     )
 
     # distributed training
@@ -211,7 +295,9 @@ def get_parser():
         "--ddp_comm_hook",
         type=str,
         default="none",
-        help="communication hook"
+        choices=["none", "fp16", "bf16"],
+        help="communication hook; fp16 and bf16 compress gradients to half precision "
+        + "before all-reduce"
     )
     parser.add_argument(
         "--bucket_cap_mb",
@@ -221,9 +307,9 @@ def get_parser():
     )
     parser.add_argument(
         "--find_unused_parameters",
-        type=bool,
+        action=argparse.BooleanOptionalAction,
         default=False,
-        help="disable unused parameter detection"
+        help="enable unused parameter detection"
     )
     parser.add_argument(
         "--heartbeat_timeout",
@@ -233,10 +319,24 @@ def get_parser():
     )
     parser.add_argument(
         "--broadcast_buffers",
-        type=bool,
+        action=argparse.BooleanOptionalAction,
         default=False,
         help="Copy non-trainable parameters between GPUs, such as batchnorm population statistics"
     )
+    parser.add_argument(
+        "--static_graph",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="let DDP assume that the set of used parameters and the graph do not change "
+        + "across iterations, which enables additional communication optimizations"
+    )
+    parser.add_argument(
+        "--gradient_as_bucket_view",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="make gradients views into the DDP all-reduce buckets to save a copy and "
+        + "memory; gradients must not be detached in-place (e.g., grad.detach_())"
+    )
     
     # checkpoint
     parser.add_argument(
@@ -253,13 +353,13 @@ def get_parser():
     )
     parser.add_argument(
         "--no_save_optimizer_state",
-        type=bool,
+        action=argparse.BooleanOptionalAction,
         default=False,
         help="don't save optimizer-state as part of checkpoint"
     )
     parser.add_argument(
         "--load_checkpoint_on_all_dp_ranks",
-        type=bool,
+        action=argparse.BooleanOptionalAction,
         default=False,
         help="load checkpoints on all data parallel devices "
         + "(default: only load on rank 0 and broadcast to other devices)"
@@ -295,21 +395,55 @@ def main(args: argparse.Namespace) -> None:
     np.random.seed(args.seed)
     random.seed(args.seed)
     utils.set_torch_seed(args.seed)
+
+    torch.backends.cuda.matmul.allow_tf32 = args.tf32
+    torch.backends.cudnn.allow_tf32 = args.tf32
+    torch.set_float32_matmul_precision("high" if args.tf32 else "highest")
+    torch.backends.cudnn.benchmark = args.cudnn_benchmark
+
+    if args.deterministic:
+        # required by deterministic cuBLAS operations
+        os.environ.setdefault("CUBLAS_WORKSPACE_CONFIG", ":4096:8")
+        torch.use_deterministic_algorithms(True)
+        torch.backends.cudnn.deterministic = True
+        torch.backends.cudnn.benchmark = False
     
     if distributed_utils.is_master(args):
         checkpoint_utils.verify_checkpoint_directory(args.save_dir)
 
     args.lr = eval(args.lr)
+    args.wandb_run_name = os.environ.get(
+        "WANDB_NAME", os.path.basename(args.save_dir)
+    )
+
+    if args.empty_cache_freq > 0:
+        logger.warning(
+            "--empty_cache_freq={} is set; emptying the CUDA cache forces re-allocations "
+            "and slows down training. Out-of-memory errors are better addressed by "
+            "reducing memory usage than by emptying the cache.".format(args.empty_cache_freq)
+        )
 
     # Print args
-    logger.info(args)
+    if distributed_utils.is_master(args):
+        logger.info(args)
     
     # Build model
     model = models.build_model(args.student_number + "_model", **vars(args))
     criterion = MultiTaskCriterion.build_criterion(args)
+
+    if args.compile:
+        if args.find_unused_parameters:
+            logger.warning("--find_unused_parameters often does not work with --compile")
+        # compile the forward in place rather than wrapping the model, so that
+        # parameter names in checkpoints stay the same as for the original model.
+        # dynamic=None marks the dimensions that change between batches (e.g., the padded
+        # sequence length) as dynamic after the first recompile, instead of recompiling
+        # for every new shape until falling back to eager
+        model.forward = torch.compile(model.forward, mode=args.compile_mode, dynamic=None)
     
-    logger.info(model)
-    logger.info("model: {}".format(model.__class__.__name__))
+    if distributed_utils.is_master(args):
+        logger.info(model)
+        logger.info("model: {}".format(model.__class__.__name__))
 
     # load dataset
     args.dataset = args.student_number + "_dataset"
@@ -317,6 +451,15 @@ def main(args: argparse.Namespace) -> None:
 
     trainer = Trainer(args, model, criterion, train=dataset)
 
+    # initialize wandb once here so that progress bars created every epoch reuse the run
+    if distributed_utils.is_master(args) and args.wandb_project:
+        progress_bar.init_wandb(
+            args.wandb_project,
+            args.wandb_entity,
+            run_name=args.wandb_run_name,
+            config=vars(args)
+        )
+
     logger.info(
         "training on {} devices (GPUs)".format(
             args.distributed_world_size
@@ -335,6 +478,13 @@ def main(args: argparse.Namespace) -> None:
         lr = trainer.lr_step(epoch_idx, valid_loss)
         
         epoch_idx += 1
+
+        if lr <= args.min_lr:
+            logger.info(
+                "stopping training because current learning rate ({}) is smaller "
+                "than or equal to minimum learning rate (--min_lr={})".format(lr, args.min_lr)
+            )
+            break
     
     train_meter.stop()
     logger.info("done training in {:.1f} seconds".format(train_meter.sum))
@@ -344,6 +494,7 @@ def train(
     args: argparse.Namespace, trainer: Trainer, epoch: int
 ):
     """Train the model for one epoch and return validation losses."""
+    is_master = distributed_utils.is_master(args)
     progress = progress_bar.progress_bar(
         trainer.iterator,
         log_format="json",
@@ -351,22 +502,11 @@ def train(
         epoch=epoch,
         tensorboard_logdir=None,
         default_log_format=("tqdm"),
-        wandb_project=(
-            args.wandb_project
-            if distributed_utils.is_master(args)
-            else None
-        ),
-        wandb_entity=(
-            args.wandb_entity
-            if distributed_utils.is_master(args)
-            else None
-        ),
-        wandb_run_name=os.environ.get(
-            "WANDB_NAME", os.path.basename(args.save_dir)
-        ),
+        wandb_project=args.wandb_project if is_master else None,
+        wandb_entity=args.wandb_entity if is_master else None,
+        wandb_run_name=args.wandb_run_name,
         azureml_logging=False
     )
-    progress.update_config(args)
 
     trainer.begin_epoch(epoch)
 
@@ -389,6 +529,15 @@ def train(
                 # the end-of-epoch stats will still be preserved
                 metrics.reset_meters("train_inner")
 
+            if (
+                trainer.valid_iterator is not None
+                and args.validate_interval_updates > 0
+                and num_updates % args.validate_interval_updates == 0
+                # the end-of-epoch validation below covers the last step
+                and i < len(trainer.iterator) - 1
+            ):
+                validate(args, trainer, epoch, end_of_epoch=False)
+
     if trainer.valid_iterator is not None:
         valid_loss = validate(
             args, trainer, epoch
@@ -421,10 +570,12 @@ def get_training_stats(stats: Dict[str, Any]) -> Dict[str, Any]:
 def validate(
     args: argparse.Namespace,
     trainer: Trainer,
-    epoch: int
+    epoch: int,
+    end_of_epoch: bool = True
 ) -> List[Optional[float]]:
     """Evaluate the model on the validation set and return the losses"""
-    
+    is_master = distributed_utils.is_master(args)
+
     trainer.begin_valid_epoch(epoch)
     logger.info('begin validation on "{0:.0%} validation" subset'.format(args.valid_percent))
 
@@ -435,19 +586,9 @@ def validate(
         epoch=epoch,
         tensorboard_logdir=None,
         default_log_format=("tqdm"),
-        wandb_project=(
-            args.wandb_project
-            if distributed_utils.is_master(args)
-            else None
-        ),
-        wandb_entity=(
-            args.wandb_entity
-            if distributed_utils.is_master(args)
-            else None
-        ),
-        wandb_run_name=os.environ.get(
-            "WANDB_NAME", os.path.basename(args.save_dir)
-        ),
+        wandb_project=args.wandb_project if is_master else None,
+        wandb_entity=args.wandb_entity if is_master else None,
+        wandb_run_name=args.wandb_run_name,
         azureml_logging=False
     )
     
@@ -456,14 +597,16 @@ def validate(
             trainer.valid_step(sample)
     
     # log validation stats
-    stats = get_valid_stats(args, trainer, agg.get_smoothed_values())
-    
+    stats = agg.get_smoothed_values()
+
     if hasattr(trainer, "post_validate"):
         trainer.post_validate(
             log_output=stats,
             agg=agg,
             num_updates=trainer.get_num_updates()
         )
+
+    stats = get_valid_stats(args, trainer, stats, end_of_epoch)
     
     progress.print(stats, tag="valid", step=trainer.get_num_updates())
 
@@ -472,9 +615,18 @@ def validate(
 def get_valid_stats(
     args: argparse.Namespace,
     trainer: Trainer,
-    stats: Dict[str, Any]
+    stats: Dict[str, Any],
+    end_of_epoch: bool = True
 ) -> Dict[str, Any]:
     stats["num_updates"] = trainer.get_num_updates()
+    # no checkpoint is saved for mid-epoch validations, so keep them out of best_auroc
+    if "auroc" in stats and end_of_epoch:
+        trainer.best_auroc = (
+            stats["auroc"]
+            if trainer.best_auroc is None
+            else max(trainer.best_auroc, stats["auroc"])
+        )
+        stats["best_auroc"] = trainer.best_auroc
 
     return stats
 
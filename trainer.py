@@ -88,6 +88,16 @@ class Trainer(object):
         except Exception:
             use_collator = True
 
+        loader_kwargs = {
+            "num_workers": args.num_workers,
+            "pin_memory": args.pin_memory,
+            "collate_fn": collator if use_collator else None
+        }
+        # these are only valid for multi-process data loading
+        if args.num_workers > 0:
+            loader_kwargs["persistent_workers"] = getattr(args, "persistent_workers", False)
+            loader_kwargs["prefetch_factor"] = getattr(args, "prefetch_factor", 2)
+
         self.iterator = DataLoader(
             dataset=dataset,
             batch_size=args.batch_size,
@@ -95,9 +105,7 @@ class Trainer(object):
             sampler=(
                 DistributedSampler(dataset)
             ) if distributed_utils.get_data_parallel_world_size() > 1 else None,
-            num_workers=args.num_workers,
-            pin_memory=args.pin_memory,
-            collate_fn=collator if use_collator else None
+            **loader_kwargs
         )
         self.valid_iterator = None
         if valid_dataset is not None:
@@ -108,9 +116,7 @@ class Trainer(object):
                 sampler=(
                     DistributedSampler(valid_dataset)
                 ) if distributed_utils.get_data_parallel_world_size() > 1 else None,
-                num_workers=args.num_workers,
-                pin_memory=args.pin_memory,
-                collate_fn=collator if use_collator else None
+                **loader_kwargs
             )
 
         self.cuda = torch.cuda.is_available()
@@ -119,6 +125,28 @@ class Trainer(object):
         else:
             self.device = torch.device("cpu")
 
+        if self.cuda and not args.pin_memory:
+            # samples are moved with non_blocking=True, which only overlaps the
+            # copy with computation if they come from pinned memory
+            logger.warning(
+                "pin_memory is disabled, so host-to-device copies of samples cannot "
+                "overlap with computation"
+            )
+
+        # automatic mixed precision
+        self.amp_dtype = {
+            "none": None,
+            "fp16": torch.float16,
+            "bf16": torch.bfloat16
+        }[getattr(args, "amp_dtype", "none")]
+        # loss scaling is only required for fp16
+        scaler_enabled = self.cuda and self.amp_dtype == torch.float16
+        if hasattr(torch.amp, "GradScaler"):
+            self.scaler = torch.amp.GradScaler("cuda", enabled=scaler_enabled)
+        else:
+            # torch < 2.3
+            self.scaler = torch.cuda.amp.GradScaler(enabled=scaler_enabled)
+
         self._criterion = criterion
         self._model = model
         
@@ -131,6 +159,11 @@ class Trainer(object):
         self._optim_history = None
         self._optimizer = None
         self._warn_once = set()
+        # best validation auroc seen so far, updated in train.get_valid_stats
+        self.best_auroc = None
+        # best validation auroc among the saved checkpoints, updated in
+        # checkpoint_utils.save_checkpoint
+        self.best_saved_auroc = None
         self._wrapped_criterion = None
         self._wrapped_model = None
         
@@ -278,6 +311,7 @@ class Trainer(object):
         
         if not self.args.no_save_optimizer_state:
             state_dict["last_optimizer_state"] = self.optimizer.state_dict()
+            state_dict["scaler"] = self.scaler.state_dict()
         return state_dict
     
     def save_checkpoint(self, filename, extra_state):
@@ -382,6 +416,8 @@ class Trainer(object):
     #             )
 
     #         self.optimzier.load_state_dict(last_optim_state, optimizer_overrides)
+    #         if "scaler" in state:
+    #             self.scaler.load_state_dict(state["scaler"])
     #         self.set_num_updates(last_optim["num_updates"])
 
 
@@ -438,8 +474,6 @@ class Trainer(object):
         self.model.train()
         self.criterion.train()
         self.zero_grad()
-
-        self.state_dict()
         
         metrics.log_start_time("train_wall", priority=800, round=0)
 
@@ -447,16 +481,11 @@ class Trainer(object):
         sample = self._prepare_sample(sample)
 
         self.model.set_num_updates(self.get_num_updates())
-        with torch.autograd.profiler.record_function("forward"):
+        with torch.autograd.profiler.record_function("forward"), self._autocast():
             loss, sample_size, logging_output = self.criterion(self.model, sample)
         with torch.autograd.profiler.record_function("backward"):
-            self.optimizer.backward(loss)
+            self.optimizer.backward(self.scaler.scale(loss))
         del loss
-        
-        # emptying the CUDA cache after the first step can
-        # reduce the chance of OOM
-        if self.cuda and self.get_num_updates() == 0:
-            torch.cuda.empty_cache()
 
         if torch.is_tensor(sample_size):
             sample_size = sample_size.float()
@@ -480,6 +509,9 @@ class Trainer(object):
             if utils.has_parameters(self.criterion):
                 self.optimizer.all_reduce_grads(self.criterion)
         
+        # undo loss scaling before touching the gradients (no-op without fp16)
+        self.scaler.unscale_(self.optimizer.optimizer)
+
         with torch.autograd.profiler.record_function("multiply-grads"):
             # multiply gradients by (data_parallel_size / sample_size) since
             # DDP normalizes by the number of data parallel workers for
@@ -503,13 +535,18 @@ class Trainer(object):
             # clip grads
             grad_norm = self.clip_grad_norm(self.args.clip_norm)
 
-        if not torch.isfinite(grad_norm).all():
+        if not torch.isfinite(grad_norm).all() and not self.scaler.is_enabled():
             # check local gradnorm single GPU case
+            # (with fp16 loss scaling, overflows are skipped by the scaler instead)
             raise FloatingPointError("gradients are Nan/Inf")
 
         with torch.autograd.profiler.record_function("optimizer"):
             # take an optimization step
-            self.optimizer.step()
+            if self.scaler.is_enabled():
+                self.scaler.step(self.optimizer.optimizer)
+                self.scaler.update()
+            else:
+                self.optimizer.step()
 
         logging_output = None
         self.set_num_updates(self.get_num_updates() + 1)
@@ -532,7 +569,8 @@ class Trainer(object):
             logging_outputs, sample_size, grad_norm
         )
 
-        # clear CUDA cache to reduce memory fragmentation
+        # clear CUDA cache to reduce memory fragmentation; this is the only place
+        # the cache is cleared, and only when explicitly requested by the user
         if (
             self.cuda
             and self.args.empty_cache_freq > 0
@@ -555,7 +593,8 @@ class Trainer(object):
             self.criterion.eval()
             
             sample = self._prepare_sample(sample)
-            loss, sample_size, logging_output = self.criterion(self.model, sample)
+            with self._autocast():
+                loss, sample_size, logging_output = self.criterion(self.model, sample)
 
             logging_outputs = [logging_output]
         
@@ -580,6 +619,13 @@ class Trainer(object):
     def zero_grad(self):
         self.optimizer.zero_grad()
 
+    def _autocast(self):
+        return torch.autocast(
+            device_type=self.device.type,
+            dtype=self.amp_dtype,
+            enabled=self.amp_dtype is not None
+        )
+
     def _set_seed(self):
         # Set seed based on args.seed and the update number so that we get
         # reproducible results when resuming from checkpoints
@@ -94,7 +94,6 @@ class set_torch_seed(object):
         torch.manual_seed(seed)
         if torch.cuda.is_available():
             torch.cuda.manual_seed(seed)
-            torch.backends.cudnn.deterministic = True
             if torch.distributed.is_initialized():
                 torch.cuda.manual_seed_all(seed)
 